@@ -2,7 +2,7 @@ import ast
 import sys
 import inspect
 from types import FrameType, FunctionType, MethodType, ModuleType
-from typing import Optional, Union, Any, List, Tuple, Set, Type, Dict
+from typing import Optional, Union, Any, List, Tuple, Set, Type, Dict, Callable
 from dataclasses import is_dataclass
 
 from pydantic import BaseModel
@@ -14,29 +14,63 @@ from npllm.core.call_site_contexts.assign_ctx import AssignCtx
 from npllm.core.call_site_contexts.if_ctx import IfCtx
 from npllm.core.call_site_contexts.return_ctx import ReturnCtx
 from npllm.core.call_site_contexts.while_ctx import WhileCtx
-from npllm.utils.source_util import remove_indentation
-from npllm.utils.inspect_util import get_class_from_module, is_module_frame
+from npllm.utils.source_util import remove_indentation, parse_source, line_index, annotated_declaration_index
+from npllm.utils.inspect_util import get_class_from_module, is_module_code, get_source
 from npllm.core.notebook import Notebook, Cell
+from npllm.utils.module_util import module_hash
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _get_class_source(cls: Type) -> Tuple[str, ModuleType]:
+    # get_source is memoized until the class's file changes, which autoreload can do without replacing the class
+    return remove_indentation(get_source(cls)), inspect.getmodule(cls)
+
+# statement type -> (field of the statement holding the call, factory of the call site context)
+_CTX_STATEMENTS: Dict[Type[ast.stmt], Tuple[str, Callable[['CallSite', ast.stmt], CallSiteCtx]]] = {
+    ast.If: ('test', lambda call_site, node: IfCtx(call_site)),
+    ast.While: ('test', lambda call_site, node: WhileCtx(call_site)),
+    ast.Assign: ('value', AssignCtx),
+    ast.AnnAssign: ('value', AnnAssignCtx),
+    ast.Return: ('value', lambda call_site, node: ReturnCtx(call_site)),
+}
+
 class CallSite:
-    _call_site_cache: Dict['CallSite', 'CallSite'] = {}
+    __slots__ = (
+        '_caller_globals', '_caller_code', '_caller_has_self', '_caller_self', '_in_notebook',
+        'enclosing_module', 'module_filename', 'line_number', 'method_name', '_is_async', '_hash',
+        'enclosing_function', 'enclosing_class',
+        'enclosing_function_source', 'enclosing_class_source', 'enclosing_module_source',
+        'enclosing_function_def', 'enclosing_class_def', 'enclosing_module_def',
+        '_node', '_ctx', '_return_type_cache', '_custom_class_type_cache', '_class_source_cache', 'return_type', 'positional_parameters', 'keyword_parameters',
+        'referenced_custom_classes', 'dependent_modules',
+    )
+
+    _call_site_cache: Dict['CallSite', Tuple[Dict[str, str], 'CallSite']] = {}
 
     @classmethod
     def of(cls, caller_frame: FrameType, method_name: str, is_async: bool, debug=False) -> 'CallSite':
         call_site = cls(caller_frame, method_name, is_async)
         if not call_site.in_notebook() and call_site in cls._call_site_cache and not debug:
-            logger.info(f"Returning cached initialized {call_site}")
-            return CallSite._call_site_cache[call_site]
-        else:
-            logger.info(f"Initializing {call_site}")
-            call_site.initialize()
-            logger.info(f"Initialized {call_site}")
-            cls._call_site_cache[call_site] = call_site
-            return call_site
+            dependent_modules_hash, cached_call_site = cls._call_site_cache[call_site]
+            if all(
+                module_hash(dependent_module) == dependent_modules_hash[module_filename]
+                for module_filename, dependent_module in cached_call_site.dependent_modules.items()
+            ):
+                logger.info(f"Returning cached initialized {call_site}")
+                return cached_call_site
+            logger.info(f"Dependent modules of {call_site} have been modified, need to reinitialize")
+
+        logger.info(f"Initializing {call_site}")
+        call_site.initialize()
+        logger.info(f"Initialized {call_site}")
+        dependent_modules_hash = {
+            module_filename: module_hash(dependent_module)
+            for module_filename, dependent_module in call_site.dependent_modules.items()
+        }
+        cls._call_site_cache[call_site] = (dependent_modules_hash, call_site)
+        return call_site
 
     def __init__(
         self,
@@ -44,7 +78,14 @@ class CallSite:
         method_name: str,
         is_async: bool
     ):
-        self._caller_frame = caller_frame
+        # snapshot what is needed from the caller frame instead of holding on to the frame itself,
+        # which would keep the whole local scope of the caller alive
+        self._caller_globals = caller_frame.f_globals
+        self._caller_code = caller_frame.f_code
+        self._in_notebook = "ipykernel" in caller_frame.f_code.co_filename
+        caller_locals = caller_frame.f_locals
+        self._caller_has_self = 'self' in caller_locals
+        self._caller_self = caller_locals.get('self')
 
         self.enclosing_module: Union[ModuleType, Cell] = None
         self.module_filename: str = None
@@ -52,16 +93,17 @@ class CallSite:
             self.enclosing_module = Notebook.current_exec_cell()
             self.module_filename = self.enclosing_module.fake_module_filename()
         else:
-            module_name = self._caller_frame.f_globals.get('__name__')
+            module_name = self._caller_globals.get('__name__')
             self.enclosing_module = sys.modules[module_name]
             self.module_filename = self.enclosing_module.__file__
 
         self.line_number = caller_frame.f_lineno
         self.method_name = method_name
+        self._hash = hash((self.module_filename, self.line_number, self.method_name))
 
         self._is_async = is_async
 
-        self.enclosing_function: Optional[Union[FunctionType, MethodType]] = None
+        self.enclosing_function: Optional[FunctionType] = None
         self.enclosing_class: Optional[Type] = None
 
         self.enclosing_function_source: Optional[str] = None
@@ -70,78 +112,63 @@ class CallSite:
 
         self.enclosing_function_def: Optional[Union[ast.FunctionDef, ast.AsyncFunctionDef]] = None
         self.enclosing_class_def: Optional[ast.ClassDef] = None
+        self.enclosing_module_def: Optional[ast.Module] = None
 
         self._node: ast.Call = None
         self._ctx = None
         
+        self._return_type_cache: Dict[Tuple[ast.AST, Optional[CallSiteReturnType]], CallSiteReturnType] = {}
+        self._custom_class_type_cache: Dict[Tuple[str, Type, Tuple[Type, ...]], CallSiteReturnType] = {}
+        self._class_source_cache: Dict[Type, Tuple[str, Union[ModuleType, Cell]]] = {}
         self.return_type: CallSiteReturnType = None
         self.positional_parameters: List[Tuple[int, CallSiteReturnType]] = None
         self.keyword_parameters: List[Tuple[str, CallSiteReturnType]] = None
 
+        self.referenced_custom_classes: List[Type] = None
         self.dependent_modules: Dict[str, Union[ModuleType, Cell]] = None
 
     def initialize(self):
         self._parse_enclosing_function()
-        self._parse_enclosing_class()
 
         self._parse_enclosing_module_source()
         self._parse_enclosing_class_source()
         self._parse_enclosing_function_source()
 
-        self._parse_enclosing_function_def()
-        self._parse_enclosing_class_def()
-        self._parse_enclosing_module_def()
+        self._parse_enclosing_defs()
 
         self._parse_ctx()
         
-        self._parse_positional_parameters()
-        self._parse_keyword_parameters()
+        self._parse_parameters_and_dependencies()
 
-        self._parse_dependent_modules()
+        # the call site outlives the call in the cache, do not keep the caller's self or namespace alive
+        self._caller_self = None
+        self._caller_globals = None
 
     def _minimal_enclosing_source_and_relative_line_number(self) -> str:
         if self.enclosing_function:
-            return self.enclosing_function_source, self.line_number - self._caller_frame.f_code.co_firstlineno + 1
+            return self.enclosing_function_source, self.line_number - self._caller_code.co_firstlineno + 1
         else:
             return self.enclosing_module_source, self.line_number
 
     def _parse_ctx(self) -> CallSiteCtx:
         ctx = None
         minimal_enclosing_source, relative_line_number = self._minimal_enclosing_source_and_relative_line_number()
-        for node in ast.walk(ast.parse(minimal_enclosing_source)):
-            if hasattr(node, 'lineno') and node.lineno == relative_line_number:
-                if self._is_async:
-                    if isinstance(node, ast.If) and isinstance(node.test, ast.Await) and node.test.value.func.attr == self.method_name:
-                        self._node = node.test.value
-                        ctx = IfCtx(self)
-                    elif isinstance(node, ast.While) and isinstance(node.test, ast.Await) and node.test.value.func.attr == self.method_name:
-                        self._node = node.test.value
-                        ctx = WhileCtx(self)
-                    elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Await) and node.value.value.func.attr == self.method_name:
-                        self._node = node.value.value
-                        ctx = AssignCtx(self, node)
-                    elif isinstance(node, ast.AnnAssign) and isinstance(node.value, ast.Await) and node.value.value.func.attr == self.method_name:
-                        self._node = node.value.value
-                        ctx = AnnAssignCtx(self, node)
-                    elif isinstance(node, ast.Return) and isinstance(node.value, ast.Await) and node.value.value.func.attr == self.method_name:
-                        self._node = node.value.value
-                        ctx = ReturnCtx(self)
-                else:
-                    if isinstance(node, ast.If) and isinstance(node.test, ast.Call) and node.test.func.attr == self.method_name:
-                        self._node = node.test.value
-                        ctx = IfCtx(self)
-                    elif isinstance(node, ast.While) and isinstance(node.test, ast.Call) and node.test.func.attr == self.method_name:
-                        self._node = node.test.value
-                        ctx = WhileCtx(self)
-                    elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Call) and node.value.func.attr == self.method_name:
-                        self._node = node.value
-                        ctx = AssignCtx(self, node)
-                    elif isinstance(node, ast.AnnAssign) and isinstance(node.value, ast.Call) and node.value.func.attr == self.method_name:
-                        ctx = AnnAssignCtx(self, node)
-                        self._node = node.value
-                    elif isinstance(node, ast.Return) and isinstance(node.value, ast.Call) and node.value.func.attr == self.method_name:
-                        self._node = node.value
-                        ctx = ReturnCtx(self)
+        for node in line_index(parse_source(minimal_enclosing_source)).get(relative_line_number, ()):
+            ctx_statement = _CTX_STATEMENTS.get(type(node))
+            if not ctx_statement:
+                continue
+
+            call_field, ctx_factory = ctx_statement
+            call = getattr(node, call_field)
+            if self._is_async:
+                if type(call) is not ast.Await:
+                    continue
+                call = call.value
+
+            if type(call) is ast.Call and type(call.func) is ast.Attribute and call.func.attr == self.method_name:
+                self._node = call
+                ctx = ctx_factory(self, node)
+                break
 
         if ctx:
             self._ctx = ctx
@@ -150,21 +177,29 @@ class CallSite:
         else:
             raise RuntimeError(f"Call site context for {self} is not supported yet")
 
-    def _parse_dependent_modules(self):
+    def _parse_parameters_and_dependencies(self):
+        self.positional_parameters = []
+        self.keyword_parameters = []
+        # the referenced classes and their modules are collected in one traversal, and the return type and
+        # the arguments often share custom class types, so one visited set across all of them walks each type once
+        visited: Set[CallSiteReturnType] = set()
+        # a dict keeps the first-referenced order while deduplicating the classes
+        referenced_custom_classes: Dict[Type, None] = {}
         dependent_modules = {}
         dependent_modules.update({self.module_filename: self.enclosing_module})
-        dependent_modules.update(self.return_type.get_dependent_modules())
-        for _, arg_type in self.positional_parameters + self.keyword_parameters:
-            dependent_modules.update(arg_type.get_dependent_modules())
-        
-        logger.info(f"Dependent modules for {self}: {dependent_modules}")
-        self.dependent_modules = dependent_modules
+        self.return_type.collect_dependencies(referenced_custom_classes, dependent_modules, visited)
 
-    def _parse_positional_parameters(self) -> List[Tuple[int, CallSiteReturnType]]:
-        self.positional_parameters = self._parse_args_types([(i, arg) for i, arg in enumerate(self._node.args)])
+        args = [(i, arg) for i, arg in enumerate(self._node.args)] + [(kw.arg, kw.value) for kw in self._node.keywords]
+        for arg_name, arg_type in self._parse_args_types(args):
+            if isinstance(arg_name, int):
+                self.positional_parameters.append((arg_name, arg_type))
+            else:
+                self.keyword_parameters.append((arg_name, arg_type))
+            arg_type.collect_dependencies(referenced_custom_classes, dependent_modules, visited)
 
-    def _parse_keyword_parameters(self) -> List[Tuple[str, CallSiteReturnType]]:
-        self.keyword_parameters = self._parse_args_types([(kw.arg, kw.value) for kw in self._node.keywords])
+        self.referenced_custom_classes = list(referenced_custom_classes)
+        logger.info(f"Dependent modules for {self}: {dependent_modules}")
+        self.dependent_modules = dependent_modules
 
     def _parse_args_types(self, args) -> List[Tuple[Union[int, str], CallSiteReturnType]]:
         args_types = []
@@ -172,12 +207,12 @@ class CallSite:
             annotation = None
             if arg_name == "return_type":
                 continue
-            elif isinstance(arg, ast.Constant):
+            elif type(arg) is ast.Constant:
                 annotation = arg
             else:
-                if isinstance(arg, ast.Name):
+                if type(arg) is ast.Name:
                     var_name = arg.id
-                elif isinstance(arg, ast.Attribute) and arg.value.id == 'self':
+                elif type(arg) is ast.Attribute and type(arg.value) is ast.Name and arg.value.id == 'self':
                     var_name = f"self.{arg.attr}"
                 else:
                     raise RuntimeError(f"Unsupported argument type: {ast.dump(arg)}")
@@ -199,19 +234,17 @@ class CallSite:
     def get_annotated_declaration_node(self, var_name: str) -> Optional[ast.AnnAssign]:
         if var_name.startswith('self.'):
             # find annotated declaration node in the enclosing class
-            enclosing_class_def = self._get_enclosing_class_def()
-            if not enclosing_class_def:
+            if not self.enclosing_class_def:
                 return None
             
-            for node in ast.walk(enclosing_class_def):
-                if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Attribute):
-                    if f"{node.target.value.id}.{node.target.attr}" == var_name:
-                        return node
+            node = annotated_declaration_index(self.enclosing_class_def).get(var_name)
+            if node:
+                return node
 
         if self.enclosing_function_def:
-            for node in ast.walk(self.enclosing_function_def):
-                if isinstance(node, ast.AnnAssign) and node.target.id == var_name:
-                    return node
+            node = annotated_declaration_index(self.enclosing_function_def).get(var_name)
+            if node:
+                return node
 
             # TODO need to check whether the arg's type is given
             for arg in self.enclosing_function_def.args.args:
@@ -222,40 +255,38 @@ class CallSite:
             cells = Notebook.current().cells
             current_cell = self.enclosing_module
             for cell in reversed(cells):
-                if cell.index <= current_cell.index:
-                    for node in ast.walk(ast.parse(cell.code)):
-                        if isinstance(node, ast.AnnAssign) and node.target.id == var_name:
-                            return node
-        else:
-            for node in ast.walk(ast.parse(self.enclosing_module_source)):
-                if isinstance(node, ast.AnnAssign) and node.target.id == var_name:
+                if cell.index > current_cell.index:
+                    continue
+                node = cell.annotated_declarations().get(var_name)
+                if node:
                     return node
+        else:
+            node = annotated_declaration_index(self.enclosing_module_def).get(var_name)
+            if node:
+                return node
         
         return None
 
     def _parse_enclosing_function(self):
-        if is_module_frame(self._caller_frame):
+        if is_module_code(self._caller_code):
             return
         
-        code_name = self._caller_frame.f_code.co_name
+        code_name = self._caller_code.co_name
 
-        if "self" in self._caller_frame.f_locals:
-            self_obj = self._caller_frame.f_locals['self']
-            method = getattr(self_obj, code_name)
+        if self._caller_has_self:
+            method = getattr(self._caller_self, code_name)
             if isinstance(method, MethodType):
-                if method.__func__.__code__ == self._caller_frame.f_code:
-                    self.enclosing_function = method
+                if method.__func__.__code__ == self._caller_code:
+                    # the bound method would keep the caller's self alive, keep its function and class instead
+                    self.enclosing_function = method.__func__
+                    self.enclosing_class = method.__self__.__class__
         else:
-            if code_name in self._caller_frame.f_globals:
-                func = self._caller_frame.f_globals[code_name]
+            if code_name in self._caller_globals:
+                func = self._caller_globals[code_name]
                 if isinstance(func, FunctionType):
                     if '.' not in func.__qualname__:
                         self.enclosing_function = func
 
-    def _parse_enclosing_class(self):
-        if self.enclosing_function and isinstance(self.enclosing_function, MethodType):
-            self.enclosing_class = self.enclosing_function.__self__.__class__
-
     def _parse_enclosing_function_source(self):
         if self.enclosing_function:
             self.enclosing_function_source = self.get_function_source(self.enclosing_function)
@@ -267,25 +298,44 @@ class CallSite:
     def _parse_enclosing_module_source(self):
         self.enclosing_module_source = self.get_module_source(self.enclosing_module)
 
-    def _parse_enclosing_function_def(self):
+    def _parse_enclosing_defs(self):
+        self.enclosing_module_def = parse_source(self.enclosing_module_source)
         if self.enclosing_function:
-            for node in ast.walk(ast.parse(self.enclosing_function_source)):
-                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == self.enclosing_function.__name__:
-                    self.enclosing_function_def = node
-                    return
-
-    def _parse_enclosing_class_def(self):
+            self.enclosing_function_def = self._find_top_level_def(
+                self.enclosing_function_source, 
+                (ast.FunctionDef, ast.AsyncFunctionDef), 
+                self.enclosing_function.__name__
+            )
         if self.enclosing_class:
-            for node in ast.walk(ast.parse(self.enclosing_class_source)):
-                if isinstance(node, ast.ClassDef) and node.name == self.enclosing_class.__name__:
-                    self.enclosing_class_def = node
-                    return
-
-    def _parse_enclosing_module_def(self):
-        for node in ast.walk(ast.parse(self.enclosing_module_source)):
-            if isinstance(node, ast.Module):
-                self.enclosing_module_def = node
-                return
+            self.enclosing_class_def = self._find_module_level_class_def() or self._find_top_level_def(
+                self.enclosing_class_source, 
+                (ast.ClassDef,), 
+                self.enclosing_class.__name__
+            )
+
+    def _find_module_level_class_def(self) -> Optional[ast.ClassDef]:
+        # a top-level class of the enclosing module is taken from the already parsed module instead of parsing its source again,
+        # classes defined elsewhere (e.g. subclasses inheriting the enclosing method) still go through their own source
+        if (
+            self.in_notebook() or 
+            self.enclosing_class.__qualname__ != self.enclosing_class.__name__ or
+            inspect.getmodule(self.enclosing_class) is not self.enclosing_module
+        ):
+            return None
+
+        class_def = None
+        for node in self.enclosing_module_def.body:
+            # the last definition is the one bound to the name once the module is executed
+            if type(node) is ast.ClassDef and node.name == self.enclosing_class.__name__:
+                class_def = node
+        return class_def
+
+    def _find_top_level_def(self, source: str, def_types: Tuple[Type[ast.stmt], ...], name: str) -> Optional[ast.stmt]:
+        # the source of a function or class is the definition itself, so there is no need to walk the whole tree
+        for node in parse_source(source).body:
+            if type(node) in def_types and node.name == name:
+                return node
+        return None
     
     def get_cls_defining_module(self, cls: Type) -> Optional[Union[ModuleType, Cell]]:
         if hasattr(cls, '__notebook_cell_id__'):
@@ -295,8 +345,8 @@ class CallSite:
 
     def get_class(self, class_name: str, enclosing_class: Optional[Type]=None) -> Optional[Type]:
         klass = None
-        if class_name in self._caller_frame.f_globals:
-            klass = self._caller_frame.f_globals[class_name]
+        if class_name in self._caller_globals:
+            klass = self._caller_globals[class_name]
             if inspect.isclass(klass) and (is_dataclass(klass) or issubclass(klass, BaseModel)):
                 if self.in_notebook():
                     klass.__in_notebook__ = True
@@ -315,22 +365,27 @@ class CallSite:
         if isinstance(module, Cell):
             return module.code
         else:
-            return inspect.getsource(module)
+            return get_source(module)
 
     def get_class_source(self, cls: Type) -> Tuple[str, Union[ModuleType, Cell]]:
-        if hasattr(cls, '__in_notebook__'):
-            return Notebook.current().find_class_source(cls)
-        else:
-            return remove_indentation(inspect.getsource(cls)), inspect.getmodule(cls)
+        # a class source is needed both to parse the return type and to build the code context
+        class_source = self._class_source_cache.get(cls)
+        if class_source is None:
+            if hasattr(cls, '__in_notebook__'):
+                class_source = Notebook.current().find_class_source(cls)
+            else:
+                class_source = _get_class_source(cls)
+            self._class_source_cache[cls] = class_source
+        return class_source
 
     def get_function_source(self, func: Union[FunctionType, MethodType]) -> str:
-        return remove_indentation(inspect.getsource(func))
+        return remove_indentation(get_source(func))
 
     def in_notebook(self) -> bool:
-        return "ipykernel" in inspect.getfile(self._caller_frame)
+        return self._in_notebook
 
     def __hash__(self) -> int:
-        return hash((self.module_filename, self.line_number, self.method_name))
+        return self._hash
 
     def __eq__(self, other: Any) -> bool:
         if not isinstance(other, CallSite):
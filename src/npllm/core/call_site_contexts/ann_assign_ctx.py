@@ -10,12 +10,8 @@ class AnnAssignCtx(CallSiteCtx):
         self._return_type = self._parse_return_type()
 
     def _parse_return_type(self) -> CallSiteReturnType:
-        type = CallSiteReturnType.from_annotation(self._ann_assign.annotation, self._call_site)
-        if type:
-            return type
+        return_type = CallSiteReturnType.from_annotation(self._ann_assign.annotation, self._call_site)
+        if return_type:
+            return return_type
 
-        raise RuntimeError(f"Failed to parse return type for {self._call_site}")
-
-    @property
-    def return_type(self) -> CallSiteReturnType:
-        return self._return_type
\ No newline at end of file
+        raise RuntimeError(f"Failed to parse return type for {self._call_site}")
\ No newline at end of file
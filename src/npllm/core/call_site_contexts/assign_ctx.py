@@ -19,14 +19,14 @@ class AssignCtx(CallSiteCtx):
             return CallSiteReturnType.from_annotation(kwargs["return_type"], self._call_site)
         
         target = self._assign.targets[0]
-        if isinstance(target, ast.Tuple):
+        if type(target) is ast.Tuple:
             # a, b = generate(...) is not supported yet
             raise RuntimeError(f"Tuple assignment is not supported yet at {self._call_site}")
         
         var_name = None
-        if isinstance(target, ast.Attribute) and target.value.id == 'self':
+        if type(target) is ast.Attribute and type(target.value) is ast.Name and target.value.id == 'self':
             var_name = f"self.{target.attr}"
-        elif isinstance(target, ast.Name):
+        elif type(target) is ast.Name:
             var_name = target.id
 
         if not var_name:
@@ -37,12 +37,8 @@ class AssignCtx(CallSiteCtx):
         if not declaration_node:
             raise RuntimeError(f"Cannot get annotated declaration node for variable {var_name} at {self._call_site}")
         
-        type = CallSiteReturnType.from_annotation(declaration_node.annotation, self._call_site)
-        if type:
-            return type
+        return_type = CallSiteReturnType.from_annotation(declaration_node.annotation, self._call_site)
+        if return_type:
+            return return_type
 
-        raise RuntimeError(f"Failed to parse return type for {self._call_site}")
-
-    @property
-    def return_type(self) -> CallSiteReturnType:
-        return self._return_type
\ No newline at end of file
+        raise RuntimeError(f"Failed to parse return type for {self._call_site}")
\ No newline at end of file
@@ -1,11 +1,7 @@
 from npllm.core.call_site_ctx import CallSiteCtx
-from npllm.core.types.bool_type import BoolType
+from npllm.core.types.bool_type import _BOOL_TYPE
 
 class IfCtx(CallSiteCtx):
     def __init__(self, call_site):
         CallSiteCtx.__init__(self, call_site)
-        self._return_type = BoolType()
-
-    @property
-    def return_type(self) -> BoolType:
-        return self._return_type
\ No newline at end of file
+        self._return_type = _BOOL_TYPE
\ No newline at end of file
@@ -13,12 +13,8 @@ class ReturnCtx(CallSiteCtx):
         if not enclosing_function_def.returns:
             raise RuntimeError(f"Cannot parse return type for {self._call_site} because the enclosing function {enclosing_function_def.name} has no return statement")
         
-        type = CallSiteReturnType.from_annotation(enclosing_function_def.returns, self._call_site)
-        if type:
-            return type
+        return_type = CallSiteReturnType.from_annotation(enclosing_function_def.returns, self._call_site)
+        if return_type:
+            return return_type
         
-        raise RuntimeError(f"Failed to parse return type for {self._call_site}")
-
-    @property
-    def return_type(self) -> CallSiteReturnType:
-        return self._return_type
\ No newline at end of file
+        raise RuntimeError(f"Failed to parse return type for {self._call_site}")
\ No newline at end of file
@@ -1,11 +1,12 @@
-from abc import ABC, abstractmethod
+from abc import ABC
 
 from npllm.core.call_site_return_type import CallSiteReturnType
 
 class CallSiteCtx(ABC):
     def __init__(self, call_site):
         self._call_site = call_site
+        self._return_type: CallSiteReturnType = None
 
-    @abstractmethod
+    @property
     def return_type(self) -> CallSiteReturnType:
-        pass
\ No newline at end of file
+        return self._return_type
\ No newline at end of file
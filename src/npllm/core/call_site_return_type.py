@@ -2,26 +2,39 @@ import ast
 import json
 import typing
 from abc import ABC, abstractmethod
-from typing import Optional, List, Set, Dict, Union
+from typing import Optional, List, Set, Dict, Tuple, Union
 from types import ModuleType
 
 from pydantic import TypeAdapter
 
 from npllm.core.notebook import Cell
 
+# node types checked by the dispatch of every parsed annotation
+_AST_NAME = ast.Name
+_AST_CONSTANT = ast.Constant
+_AST_SUBSCRIPT = ast.Subscript
+
 class CallSiteReturnType(ABC):
+    __slots__ = ('_call_site', '_enclosing_type', '_custom_class_scope', '_children', '_pydantic_type_adapter', '_json_schema', '_str')
+
+    # annotation node type -> the types which can be parsed from it, in the order they are tried
+    _candidate_types: Optional[Dict[typing.Type[ast.AST], List[typing.Type['CallSiteReturnType']]]] = None
+    # name of the generic type of a subscript -> the only type which can be parsed from it
+    _subscript_types: Optional[Dict[str, List[typing.Type['CallSiteReturnType']]]] = None
+    # name of a primitive type, or python type of the value of a constant -> the shared primitive type instance
+    _primitive_names: Optional[Dict[str, 'CallSiteReturnType']] = None
+    _primitive_constants: Optional[Dict[type, 'CallSiteReturnType']] = None
+    # set on a primitive type to its only instance, which every construction of the type gives back,
+    # primitives hold no call site specific state and share one pydantic type adapter and json schema
+    _shared_instance: Optional['CallSiteReturnType'] = None
+
     @classmethod
-    def from_annotation(
-        cls, 
-        annotation: ast.AST, 
-        call_site, 
-        enclosing_type: Optional['CallSiteReturnType']=None
-    ) -> 'CallSiteReturnType':
-        from npllm.core.types.str_type import StrType
-        from npllm.core.types.int_type import IntType
-        from npllm.core.types.float_type import FloatType
-        from npllm.core.types.bool_type import BoolType
-        from npllm.core.types.any_type import AnyType
+    def _init_dispatch_tables(cls):
+        from npllm.core.types.str_type import _STR_TYPE
+        from npllm.core.types.int_type import _INT_TYPE
+        from npllm.core.types.float_type import _FLOAT_TYPE
+        from npllm.core.types.bool_type import _BOOL_TYPE
+        from npllm.core.types.any_type import _ANY_TYPE
         from npllm.core.types.custom_class_type import CustomClassType
         from npllm.core.types.list_type import ListType
         from npllm.core.types.tuple_type import TupleType
@@ -29,40 +42,145 @@ class CallSiteReturnType(ABC):
         from npllm.core.types.union_type import UnionType
         from npllm.core.types.literal_type import LiteralType
         from npllm.core.types.optional_type import OptionalType
-        
-        return (
-                StrType.from_annotation(annotation, call_site, enclosing_type) or
-                IntType.from_annotation(annotation, call_site, enclosing_type) or
-                FloatType.from_annotation(annotation, call_site, enclosing_type) or
-                BoolType.from_annotation(annotation, call_site, enclosing_type) or
-                AnyType.from_annotation(annotation, call_site, enclosing_type) or 
-                ListType.from_annotation(annotation, call_site, enclosing_type) or
-                TupleType.from_annotation(annotation, call_site, enclosing_type) or
-                DictType.from_annotation(annotation, call_site, enclosing_type) or
-                UnionType.from_annotation(annotation, call_site, enclosing_type) or
-                LiteralType.from_annotation(annotation, call_site, enclosing_type) or
-                OptionalType.from_annotation(annotation, call_site, enclosing_type) or 
-                CustomClassType.from_annotation(annotation, call_site, enclosing_type)
-            )
+
+        CallSiteReturnType._candidate_types = {
+            ast.BinOp: [UnionType, CustomClassType],
+            # anything else is only tried as a custom class, which reports the failure
+            None: [CustomClassType],
+        }
+        CallSiteReturnType._primitive_names = {
+            'str': _STR_TYPE,
+            'int': _INT_TYPE,
+            'float': _FLOAT_TYPE,
+            'bool': _BOOL_TYPE,
+            'Any': _ANY_TYPE,
+        }
+        # StrType accepts any str constant, so a quoted name is never looked up as a custom class
+        CallSiteReturnType._primitive_constants = {
+            str: _STR_TYPE,
+            int: _INT_TYPE,
+            float: _FLOAT_TYPE,
+            bool: _BOOL_TYPE,
+        }
+        CallSiteReturnType._subscript_types = {
+            'List': [ListType], 'list': [ListType],
+            'Tuple': [TupleType], 'tuple': [TupleType],
+            'Dict': [DictType], 'dict': [DictType],
+            'Union': [UnionType], 'union': [UnionType],
+            'Literal': [LiteralType], 'literal': [LiteralType],
+            'Optional': [OptionalType], 'optional': [OptionalType],
+        }
+
+    @classmethod
+    def _get_candidate_types(cls, annotation: ast.AST) -> List[typing.Type['CallSiteReturnType']]:
+        candidate_types = CallSiteReturnType._candidate_types
+        annotation_type = type(annotation)
+        if annotation_type is _AST_SUBSCRIPT and type(annotation.value) is _AST_NAME:
+            return CallSiteReturnType._subscript_types.get(annotation.value.id) or candidate_types[None]
+        return candidate_types.get(annotation_type) or candidate_types[None]
+
+    @classmethod
+    def from_annotation(
+        cls, 
+        annotation: ast.AST, 
+        call_site, 
+        enclosing_type: Optional['CallSiteReturnType']=None
+    ) -> 'CallSiteReturnType':
+        if CallSiteReturnType._candidate_types is None:
+            cls._init_dispatch_tables()
+
+        # primitives are shared instances, look them up before anything else
+        annotation_type = type(annotation)
+        if annotation_type is _AST_NAME:
+            primitive_type = CallSiteReturnType._primitive_names.get(annotation.id)
+            if primitive_type is not None:
+                return primitive_type
+        elif annotation_type is _AST_CONSTANT:
+            primitive_type = CallSiteReturnType._primitive_constants.get(type(annotation.value))
+            if primitive_type is not None:
+                return primitive_type
+
+        # the same declaration can be referenced by several arguments of a call site, parse it only once
+        cache_key = (annotation, enclosing_type)
+        if cache_key in call_site._return_type_cache:
+            return call_site._return_type_cache[cache_key]
+
+        return_type = None
+        for candidate_type in cls._get_candidate_types(annotation):
+            return_type = candidate_type.from_annotation(annotation, call_site, enclosing_type)
+            if return_type:
+                call_site._return_type_cache[cache_key] = return_type
+                break
+
+        return return_type
     
+    def __new__(cls, *args, **kwargs):
+        shared_instance = cls.__dict__.get('_shared_instance')
+        if shared_instance is not None:
+            return shared_instance
+        return super().__new__(cls)
+
     def __init__(self, call_site, enclosing_type: Optional['CallSiteReturnType']=None):
+        if self is type(self).__dict__.get('_shared_instance'):
+            # keep the adapter and schema already built for the shared instance
+            return
         self._call_site = call_site
         self._enclosing_type = enclosing_type
+        # the innermost custom class type this type is nested in, the custom class type itself for custom classes
+        self._custom_class_scope = enclosing_type._custom_class_scope if enclosing_type else None
+        # the member types, set together with them so that traversals iterate one tuple for every kind of type
+        self._children: Tuple['CallSiteReturnType', ...] = ()
+        self._pydantic_type_adapter: Optional[TypeAdapter] = None
+        self._json_schema: Optional[str] = None
+        # composite types render their members recursively, which is done for every log line and prompt
+        self._str: Optional[str] = None
 
     def pydantic_type_adapter(self) -> TypeAdapter:
-        return TypeAdapter(self.runtime_type())
+        # building the adapter compiles a validator for the whole type, do it once per return type
+        if self._pydantic_type_adapter is None:
+            self._pydantic_type_adapter = TypeAdapter(self.runtime_type())
+        return self._pydantic_type_adapter
 
     def json_schema(self) -> str:
-        return json.dumps(self.pydantic_type_adapter().json_schema(), ensure_ascii=False, indent=2)
+        # rendered into the system prompt on every execution of the call site
+        if self._json_schema is None:
+            self._json_schema = json.dumps(self.pydantic_type_adapter().json_schema(), ensure_ascii=False, indent=2)
+        return self._json_schema
 
-    @abstractmethod
-    def runtime_type(self) -> typing.Type:
-        pass
+    def collect_dependencies(
+        self,
+        referenced_custom_classes: Dict[typing.Type, None],
+        dependent_modules: Dict[str, Union[ModuleType, Cell]],
+        visited: Optional[Set['CallSiteReturnType']]=None
+    ):
+        """Collect the referenced custom classes and the modules defining them in a single traversal"""
+        if visited is None:
+            visited = set()
+        if self in visited:
+            return
+        visited.add(self)
 
-    @abstractmethod
-    def get_dependent_modules(self) -> Dict[str, Union[ModuleType, Cell]]:
+        self._collect_own_dependencies(referenced_custom_classes, dependent_modules)
+        for child_type in self._children:
+            child_type.collect_dependencies(referenced_custom_classes, dependent_modules, visited)
+
+    def get_dependent_modules(self, visited: Optional[Set['CallSiteReturnType']]=None) -> Dict[str, Union[ModuleType, Cell]]:
+        dependent_modules = {}
+        self.collect_dependencies({}, dependent_modules, visited)
+        return dependent_modules
+
+    def get_referenced_custom_classes(self, visited: Optional[Set['CallSiteReturnType']]=None) -> List[typing.Type]:
+        referenced_custom_classes = {}
+        self.collect_dependencies(referenced_custom_classes, {}, visited)
+        return list(referenced_custom_classes)
+
+    def _collect_own_dependencies(
+        self,
+        referenced_custom_classes: Dict[typing.Type, None],
+        dependent_modules: Dict[str, Union[ModuleType, Cell]]
+    ):
         pass
 
     @abstractmethod
-    def get_referenced_custom_classes(self, visited: Optional[Set['Type']]=None) -> List[typing.Type]:
-        pass
\ No newline at end of file
+    def runtime_type(self) -> typing.Type:
+        pass
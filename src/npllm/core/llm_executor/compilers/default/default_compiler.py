@@ -114,7 +114,7 @@ class DefaultCompilationResult:
     @classmethod
     def from_llm_response(cls, response: ModelResponse, call_site: CallSite) -> 'DefaultCompilationResult':
         response_content = response.choices[0].message.content.strip()
-        logger.debug(f"Raw response content from compile-time LLM: {response_content}")
+        logger.debug("Raw response content from compile-time LLM: %s", response_content)
         if response_content.startswith("```xml"):
             response_content = response_content[len("```xml"):-len("```")].strip()
 
@@ -282,7 +282,7 @@ class DefaultCompiler(Compiler):
     async def _do_compile(self, call_site: CallSite, code_context_provider: CodeContextProvider) -> CompilationResult:
         logger.info(f"Compile {call_site} with model {self._model}")
         task = CompilationTask(call_site, code_context_provider)
-        logger.debug(f"Compilation task: {task}")
+        logger.debug("Compilation task: %s", task)
         messages = [
             {"role": "system", "content": self._system_prompt},
             {"role": "user", "content": f"{task}"}
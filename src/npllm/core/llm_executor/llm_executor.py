@@ -43,7 +43,7 @@ class LLMExecutor(CallSiteExecutor):
             args=args, 
             kwargs=kwargs
         )
-        logger.debug(f"Runtime LLM system prompt: {system_prompt}")
+        logger.debug("Runtime LLM system prompt: %s", system_prompt)
 
         user_prompt = None
         if compilation_result.user_prompt_template:
@@ -51,7 +51,7 @@ class LLMExecutor(CallSiteExecutor):
                 args=args,
                 kwargs=kwargs
             )
-            logger.debug(f"Runtime LLM user prompt: {user_prompt}")
+            logger.debug("Runtime LLM user prompt: %s", user_prompt)
 
         messages = [{"role": "system", "content": system_prompt}]
         if user_prompt:
@@ -68,7 +68,7 @@ class LLMExecutor(CallSiteExecutor):
         )
 
         response_content = response.choices[0].message.content.strip()
-        logger.debug(f"Raw response content from runtime LLM: {response_content}")
+        logger.debug("Raw response content from runtime LLM: %s", response_content)
 
         json_value = parse_json_str(response_content)
 
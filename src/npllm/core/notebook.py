@@ -1,13 +1,16 @@
 import hashlib
 import json
+import os
 import ast
 from dataclasses import dataclass
-from typing import List, Type, Optional, Tuple
+from typing import List, Type, Optional, Tuple, Dict, Any
 
 from IPython import get_ipython
 import ipynbname
 
-@dataclass
+from npllm.utils.source_util import find_class_def, parse_source, annotated_declaration_index
+
+@dataclass(slots=True, frozen=True)
 class Cell:
     path: str
     id: str
@@ -19,17 +22,28 @@ class Cell:
     def fake_module_filename(self) -> str:
         return f"{self.path}#{self.id}"
 
+    def annotated_declarations(self) -> Dict[str, ast.AnnAssign]:
+        return annotated_declaration_index(parse_source(self.code))
+
     def __eq__(self, value: object) -> bool:
         if not isinstance(value, Cell):
             return False
 
         return self.path == value.path and self.id == value.id
 
+    def __hash__(self) -> int:
+        return hash((self.path, self.id))
+
 class Notebook:
+    _notebooks: Dict[str, 'Notebook'] = {}
+
     @classmethod
     def current(cls) -> 'Notebook':
+        # share one instance per path so the parsed cells are cached across lookups
         path = ipynbname.path()
-        return Notebook(path)
+        if path not in cls._notebooks:
+            cls._notebooks[path] = Notebook(path)
+        return cls._notebooks[path]
 
     @classmethod
     def current_exec_cell(cls) -> Cell:
@@ -38,20 +52,29 @@ class Notebook:
 
     def __init__(self, path: str):
         self.path = path
+        self._cells_cache: Optional[Tuple[int, List[Cell]]] = None
 
     @property
     def cells(self) -> List[Cell]:
+        mtime = os.stat(self.path).st_mtime_ns
+        if self._cells_cache and self._cells_cache[0] == mtime:
+            return self._cells_cache[1]
+
         with open(self.path, "r", encoding="utf-8") as f:
-            notebook_data = json.load(f)
-            cells = []
-            for index, cell in enumerate(notebook_data["cells"]):
-                if cell["cell_type"] == "code":
-                    id = cell["id"]
-                    code = "".join(cell["source"]).rstrip("\n")
-                    code_hash = hashlib.md5(code.encode(encoding="utf-8")).hexdigest()
-                    cells.append(Cell(self.path, id, code, code_hash, index, self))
+            cells = self._parse_cells(json.load(f))
+            self._cells_cache = (mtime, cells)
             return cells
 
+    def _parse_cells(self, notebook_data: Dict[str, Any]) -> List[Cell]:
+        cells = []
+        for index, cell in enumerate(notebook_data["cells"]):
+            if cell["cell_type"] == "code":
+                id = cell["id"]
+                code = "".join(cell["source"]).rstrip("\n")
+                code_hash = hashlib.md5(code.encode(encoding="utf-8")).hexdigest()
+                cells.append(Cell(self.path, id, code, code_hash, index, self))
+        return cells
+
     def find_cell_by_id(self, id: str) -> Optional[Cell]:
         for cell in self.cells:
             if cell.id == id:
@@ -75,11 +98,10 @@ class Notebook:
     def find_class_source(self, cls: Type) -> Tuple[str, Cell]:
         for cell in self.cells:
             cell_source = cell.code
-            tree = ast.parse(cell_source)
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef) and node.name == cls.__name__:
-                    cls.__notebook_cell_id__ = cell.id
-                    return ast.unparse(node), cell
+            node = find_class_def(parse_source(cell_source), cls.__name__)
+            if node:
+                cls.__notebook_cell_id__ = cell.id
+                return ast.unparse(node), cell
 
     def __hash__(self) -> int:
         return hash(self.path)
@@ -1,45 +1,15 @@
-import ast
-from typing import Optional, Any, Set, List, Type, Dict, Union
-from types import ModuleType
+from typing import Any, Type
 
 from npllm.core.call_site_return_type import CallSiteReturnType
-from npllm.core.notebook import Cell
 
 class AnyType(CallSiteReturnType):
-    @classmethod
-    def from_annotation(
-        cls, 
-        annotation: ast.Name | ast.Constant,
-        call_site,
-        enclosing_type: Optional[CallSiteReturnType]=None
-    ) -> Optional['AnyType']:
-        if isinstance(annotation, ast.Name) and annotation.id == 'Any':
-            return AnyType(call_site, enclosing_type)
-        if isinstance(annotation, ast.Constant) and annotation.value == 'Any':
-            return AnyType(call_site, enclosing_type)
-        return None
-    
-    def __init__(self, call_site, enclosing_type: Optional[CallSiteReturnType]=None):
-        CallSiteReturnType.__init__(self, call_site, enclosing_type)
+    __slots__ = ()
 
     def runtime_type(self) -> Type:
         return Any
 
-    def get_referenced_custom_classes(self, visited: Optional[Set['CallSiteReturnType']]=None) -> List[Type]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return []
-        visited.add(self)
-        return []
-
-    def get_dependent_modules(self, visited: Optional[Set['CallSiteReturnType']]=None) -> Dict[str, Union[ModuleType, Cell]]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return {}
-        visited.add(self)
-        return {}
-    
     def __str__(self):
-        return "Any"
\ No newline at end of file
+        return "Any"
+
+_ANY_TYPE = AnyType(None)
+AnyType._shared_instance = _ANY_TYPE
\ No newline at end of file
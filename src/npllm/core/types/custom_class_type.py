@@ -1,43 +1,30 @@
 import ast
-from typing import Optional, Dict, Set, List, Type, Union
+from functools import lru_cache
+from typing import Optional, Dict, Tuple, Type, Union
 from types import ModuleType
 
 from npllm.core.call_site_return_type import CallSiteReturnType
 from npllm.core.notebook import Cell
 from npllm.utils.module_util import module_path
+from npllm.utils.source_util import find_class_def, parse_source
 
 import logging
 
 logger = logging.getLogger(__name__)
 
-class CustomClassType(CallSiteReturnType):
-    @classmethod
-    def _enclosing_custom_class_type(
-        cls, 
-        enclosing_type: CallSiteReturnType
-    ) -> Optional['CustomClassType']:
-        current = enclosing_type
-        while current:
-            if isinstance(current, CustomClassType):
-                return current
-            current = current._enclosing_type
+@lru_cache(maxsize=1024)
+def _get_field_annotations(custom_class_source: str, class_name: str) -> Optional[Tuple[Tuple[str, ast.expr], ...]]:
+    node = find_class_def(parse_source(custom_class_source), class_name)
+    if not node:
         return None
+    return tuple(
+        (stmt.target.id, stmt.annotation)
+        for stmt in node.body
+        if type(stmt) is ast.AnnAssign and type(stmt.target) is ast.Name
+    )
 
-    @classmethod
-    def _self_referencing_custom_class_type(
-        cls, 
-        custom_class_cls: Type, 
-        enclosing_type: CallSiteReturnType
-    ) -> Optional['CustomClassType']:
-        current = enclosing_type
-        while current:
-            if (
-                isinstance(current, CustomClassType) and 
-                current._custom_class_cls == custom_class_cls
-            ):
-                return current
-            current = current._enclosing_type
-        return None
+class CustomClassType(CallSiteReturnType):
+    __slots__ = ('_custom_class_name', '_custom_class_cls', '_field_types', '_custom_class_chain', '_custom_class_chain_classes')
 
     @classmethod
     def from_annotation(
@@ -47,49 +34,61 @@ class CustomClassType(CallSiteReturnType):
         enclosing_type: Optional[CallSiteReturnType]=None
     ) -> Optional['CustomClassType']:
         class_name = None
-        if isinstance(annotation, ast.Name):
+        if type(annotation) is ast.Name:
             class_name = annotation.id
-        elif isinstance(annotation, ast.Constant):
+        elif type(annotation) is ast.Constant:
             class_name = annotation.value
         
-        enclosing_custom_class = None
-        enclosing_custom_class_type = cls._enclosing_custom_class_type(enclosing_type)
-        if enclosing_custom_class_type:
-            enclosing_custom_class = enclosing_custom_class_type._custom_class_cls
-        
+        # the chain of enclosing custom classes is kept on each custom class type, innermost first
+        enclosing_custom_class_types = ()
+        enclosing_custom_classes = ()
+        nearest_custom_class_type = enclosing_type._custom_class_scope if enclosing_type else None
+        if nearest_custom_class_type:
+            enclosing_custom_class_types = nearest_custom_class_type._custom_class_chain
+            enclosing_custom_classes = nearest_custom_class_type._custom_class_chain_classes
+
+        enclosing_custom_class = enclosing_custom_classes[0] if enclosing_custom_classes else None
         custom_class_cls = call_site.get_class(class_name, enclosing_custom_class)
         if not custom_class_cls:
             raise RuntimeError(f"Cannot find custom class {class_name}")
         
-        logger.debug(f"CustomClassType.from_annotation: {ast.dump(annotation)}...")
-        self_referencing_custom_class_type = cls._self_referencing_custom_class_type(custom_class_cls, enclosing_type)
-        if self_referencing_custom_class_type:
-            logger.debug(f"CustomClassType.from_annotation: {class_name} is self-referencing")
-            return self_referencing_custom_class_type
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("CustomClassType.from_annotation: %s...", ast.dump(annotation))
+        if custom_class_cls in enclosing_custom_classes:
+            logger.debug("CustomClassType.from_annotation: %s is self-referencing", class_name)
+            return enclosing_custom_class_types[enclosing_custom_classes.index(custom_class_cls)]
+
+        # a custom class referenced by several fields under the same chain of enclosing custom classes
+        # resolves and parses to the same type every time, so parse it only once per call site
+        cache_key = (class_name, custom_class_cls, enclosing_custom_classes)
+        if cache_key in call_site._custom_class_type_cache:
+            logger.debug("CustomClassType.from_annotation: reusing parsed CustomClassType for %s", class_name)
+            return call_site._custom_class_type_cache[cache_key]
         
         custom_class_source = call_site.get_class_source(custom_class_cls)[0]
         if not custom_class_source:
             raise RuntimeError(f"Cannot get source of custom class {class_name}")
 
         custom_class_type = CustomClassType(call_site, class_name, custom_class_cls, enclosing_type=enclosing_type)
-        logger.debug(f"CustomClassType.from_annotation: early created CustomClassType for {class_name} for self referencing")
+        logger.debug("CustomClassType.from_annotation: early created CustomClassType for %s for self referencing", class_name)
 
-        field_types = {}
-        for node in ast.walk(ast.parse(custom_class_source)):
-            if isinstance(node, ast.ClassDef) and node.name == class_name:
-                for stmt in node.body:
-                    if isinstance(stmt, ast.AnnAssign) and isinstance(stmt.target, ast.Name):
-                        field_name = stmt.target.id
-                        field_type = CallSiteReturnType.from_annotation(stmt.annotation, call_site, custom_class_type)
-                        if not field_type:
-                            raise RuntimeError(f"Cannot parse field type for {field_name} in custom class {class_name}")
-                        field_types[field_name] = field_type
-                
-                custom_class_type._field_types = field_types
-                logger.debug(f"CustomClassType.from_annotation: {ast.dump(annotation)}")
-                return custom_class_type
+        field_annotations = _get_field_annotations(custom_class_source, class_name)
+        if field_annotations is None:
+            raise RuntimeError(f"Failed to parse custom class {class_name}")
 
-        raise RuntimeError(f"Failed to parse custom class {class_name}")
+        field_types = {}
+        for field_name, field_annotation in field_annotations:
+            field_type = CallSiteReturnType.from_annotation(field_annotation, call_site, custom_class_type)
+            if not field_type:
+                raise RuntimeError(f"Cannot parse field type for {field_name} in custom class {class_name}")
+            field_types[field_name] = field_type
+        
+        custom_class_type._field_types = field_types
+        custom_class_type._children = tuple(field_types.values())
+        call_site._custom_class_type_cache[cache_key] = custom_class_type
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("CustomClassType.from_annotation: %s", ast.dump(annotation))
+        return custom_class_type
 
     def __init__(
         self,
@@ -103,36 +102,27 @@ class CustomClassType(CallSiteReturnType):
         self._custom_class_name = custom_class_name
         self._custom_class_cls = custom_class_cls
         self._field_types = field_types or {}
+        self._children = tuple(self._field_types.values())
+        nearest_custom_class_type = self._custom_class_scope
+        if nearest_custom_class_type:
+            self._custom_class_chain = (self,) + nearest_custom_class_type._custom_class_chain
+            self._custom_class_chain_classes = (custom_class_cls,) + nearest_custom_class_type._custom_class_chain_classes
+        else:
+            self._custom_class_chain = (self,)
+            self._custom_class_chain_classes = (custom_class_cls,)
+        self._custom_class_scope = self
 
     def runtime_type(self) -> Type:
         return self._custom_class_cls
 
-    def get_referenced_custom_classes(self, visited: Optional[Set[CallSiteReturnType]]=None) -> List[Type]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return []
-        visited.add(self)
-        result = []
-        result.append(self._custom_class_cls)
-        for field_type in self._field_types.values():
-            result.extend(field_type.get_referenced_custom_classes(visited))
-        return result
-
-    def get_dependent_modules(self, visited: Optional[Set[CallSiteReturnType]]=None) -> Dict[str, Union[ModuleType, Cell]]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return {}
-
-        visited.add(self)
-        dependent_modules = {}
+    def _collect_own_dependencies(
+        self,
+        referenced_custom_classes: Dict[Type, None],
+        dependent_modules: Dict[str, Union[ModuleType, Cell]]
+    ):
+        referenced_custom_classes[self._custom_class_cls] = None
         defining_module = self._call_site.get_cls_defining_module(self._custom_class_cls)
-        dependent_modules.update({module_path(defining_module): defining_module})
-
-        for field_type in self._field_types.values():
-            dependent_modules.update(field_type.get_dependent_modules(visited))
-        return dependent_modules
+        dependent_modules[module_path(defining_module)] = defining_module
 
     def __str__(self):
         return f"{self._custom_class_name}"
\ No newline at end of file
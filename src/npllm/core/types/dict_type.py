@@ -1,9 +1,7 @@
 import ast
-from typing import Optional, Dict, Set, List, Type, Union
-from types import ModuleType
+from typing import Optional, Dict, Type
 
 from npllm.core.call_site_return_type import CallSiteReturnType
-from npllm.core.notebook import Cell
 from npllm.core.types.str_type import StrType
 
 import logging
@@ -11,6 +9,8 @@ import logging
 logger = logging.getLogger(__name__)
     
 class DictType(CallSiteReturnType):
+    __slots__ = ('_key_type', '_value_type')
+
     @classmethod
     def from_annotation(
         cls, 
@@ -19,22 +19,26 @@ class DictType(CallSiteReturnType):
         enclosing_type: Optional[CallSiteReturnType]=None
     ) -> Optional['DictType']:
         if (
-            not isinstance(annotation, ast.Subscript) or 
-            not isinstance(annotation.value, ast.Name) or 
-            annotation.value.id not in ['Dict', 'dict']
+            type(annotation) is not ast.Subscript or 
+            type(annotation.value) is not ast.Name or 
+            annotation.value.id not in ('Dict', 'dict')
         ):
             return None
         
-        logger.debug(f"DictType.from_annotation: {ast.dump(annotation)}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("DictType.from_annotation: %s...", ast.dump(annotation))
         dict_type = DictType(call_site, enclosing_type=enclosing_type)
-        key_type = CallSiteReturnType.from_annotation(annotation.slice.elts[0], call_site, dict_type)
-        value_type = CallSiteReturnType.from_annotation(annotation.slice.elts[1], call_site, dict_type)
+        key_annotation, value_annotation = annotation.slice.elts
+        key_type = CallSiteReturnType.from_annotation(key_annotation, call_site, dict_type)
+        value_type = CallSiteReturnType.from_annotation(value_annotation, call_site, dict_type)
         if key_type and value_type:
             if not isinstance(key_type, StrType):
                 raise RuntimeError("Only str key type is supported in Dict")
             dict_type._key_type = key_type
             dict_type._value_type = value_type
-            logger.debug(f"DictType.from_annotation: {ast.dump(annotation)}")
+            dict_type._children = (key_type, value_type)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("DictType.from_annotation: %s", ast.dump(annotation))
             return dict_type
         raise RuntimeError(f"Failed to parse dict type for {ast.dump(annotation)}")
 
@@ -48,31 +52,12 @@ class DictType(CallSiteReturnType):
         CallSiteReturnType.__init__(self, call_site, enclosing_type)
         self._key_type = key_type
         self._value_type = value_type
+        self._children = (key_type, value_type) if key_type and value_type else ()
 
     def runtime_type(self) -> Type:
         return Dict[self._key_type.runtime_type(), self._value_type.runtime_type()]
 
-    def get_referenced_custom_classes(self, visited: Optional[Set[CallSiteReturnType]]=None) -> List[Type]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return []
-        visited.add(self)
-        result = []
-        result.extend(self._key_type.get_referenced_custom_classes(visited))
-        result.extend(self._value_type.get_referenced_custom_classes(visited))
-        return result
-
-    def get_dependent_modules(self, visited: Optional[Set[CallSiteReturnType]]=None) -> Dict[str, Union[ModuleType, Cell]]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return {}
-        visited.add(self)
-        dependent_modules = {}
-        dependent_modules.update(self._key_type.get_dependent_modules(visited))
-        dependent_modules.update(self._value_type.get_dependent_modules(visited))
-        return dependent_modules
-
     def __str__(self):
-        return f"Dict[{self._key_type}, {self._value_type}]"
\ No newline at end of file
+        if self._str is None:
+            self._str = f"Dict[{self._key_type}, {self._value_type}]"
+        return self._str
\ No newline at end of file
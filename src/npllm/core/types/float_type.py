@@ -1,45 +1,15 @@
-import ast
-from typing import Optional, Set, List, Type, Dict, Union
-from types import ModuleType
+from typing import Type
 
 from npllm.core.call_site_return_type import CallSiteReturnType
-from npllm.core.notebook import Cell
 
 class FloatType(CallSiteReturnType):
-    @classmethod
-    def from_annotation(
-        cls, 
-        annotation: ast.Name | ast.Constant,
-        call_site,
-        enclosing_type: Optional[CallSiteReturnType]=None
-    ) -> Optional['FloatType']:
-        if isinstance(annotation, ast.Name) and annotation.id == 'float':
-            return FloatType(call_site, enclosing_type)
-        if isinstance(annotation, ast.Constant) and (annotation.value == 'float' or type(annotation.value) == float):
-            return FloatType(call_site, enclosing_type)
-        return None
-    
-    def __init__(self, call_site, enclosing_type: Optional[CallSiteReturnType]=None):
-        CallSiteReturnType.__init__(self, call_site, enclosing_type)
+    __slots__ = ()
 
     def runtime_type(self) -> Type:
         return float
 
-    def get_referenced_custom_classes(self, visited: Optional[Set[CallSiteReturnType]]=None) -> List[Type]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return []
-        visited.add(self)
-        return []
-
-    def get_dependent_modules(self, visited: Optional[Set[CallSiteReturnType]]=None) -> Dict[str, Union[ModuleType, Cell]]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return {}
-        visited.add(self)
-        return {}
-
     def __str__(self):
-        return "float"
\ No newline at end of file
+        return "float"
+
+_FLOAT_TYPE = FloatType(None)
+FloatType._shared_instance = _FLOAT_TYPE
\ No newline at end of file
@@ -1,15 +1,15 @@
 import ast
-from typing import Optional, Set, List, Type, Dict, Union
-from types import ModuleType
+from typing import Optional, Type
 
 from npllm.core.call_site_return_type import CallSiteReturnType
-from npllm.core.notebook import Cell
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 class OptionalType(CallSiteReturnType):
+    __slots__ = ('_item_type',)
+
     @classmethod
     def from_annotation(
         cls, 
@@ -18,43 +18,33 @@ class OptionalType(CallSiteReturnType):
         enclosing_type: Optional[CallSiteReturnType]=None
     ) -> Optional['OptionalType']:
         if (
-            not isinstance(annotation, ast.Subscript) or 
-            not isinstance(annotation.value, ast.Name) or 
-            annotation.value.id not in ['Optional', 'optional']
+            type(annotation) is not ast.Subscript or 
+            type(annotation.value) is not ast.Name or 
+            annotation.value.id not in ('Optional', 'optional')
         ):
             return None
         
-        logger.debug(f"OptionalType.from_annotation: {ast.dump(annotation)}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("OptionalType.from_annotation: %s...", ast.dump(annotation))
         optional_type = OptionalType(call_site, enclosing_type=enclosing_type)
         item_type = CallSiteReturnType.from_annotation(annotation.slice, call_site, optional_type)
         if item_type:
             optional_type._item_type = item_type
-            logger.debug(f"OptionalType.from_annotation: {ast.dump(annotation)}")
+            optional_type._children = (item_type,)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("OptionalType.from_annotation: %s", ast.dump(annotation))
             return optional_type
         raise RuntimeError(f"Failed to parse optional type for {ast.dump(annotation)}")
 
     def __init__(self, call_site, item_type: Optional[CallSiteReturnType]=None, enclosing_type: Optional[CallSiteReturnType]=None):
         CallSiteReturnType.__init__(self, call_site, enclosing_type)
         self._item_type = item_type
+        self._children = (item_type,) if item_type else ()
 
     def runtime_type(self) -> Type:
         return Optional[self._item_type.runtime_type()]
 
-    def get_referenced_custom_classes(self, visited: Optional[Set[CallSiteReturnType]]=None) -> List[Type]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return []
-        visited.add(self)
-        return self._item_type.get_referenced_custom_classes(visited)
-
-    def get_dependent_modules(self, visited: Optional[Set[CallSiteReturnType]]=None) -> Dict[str, Union[ModuleType, Cell]]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return {}
-        visited.add(self)
-        return self._item_type.get_dependent_modules(visited)
-
     def __str__(self):
-        return f"Optional[{self._item_type}]"
\ No newline at end of file
+        if self._str is None:
+            self._str = f"Optional[{self._item_type}]"
+        return self._str
\ No newline at end of file
@@ -1,15 +1,15 @@
 import ast
-from typing import Optional, List, Tuple, Set, Type, Dict, Union
-from types import ModuleType
+from typing import Optional, List, Tuple, Type
 
 from npllm.core.call_site_return_type import CallSiteReturnType
-from npllm.core.notebook import Cell
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 class TupleType(CallSiteReturnType):
+    __slots__ = ('_item_types',)
+
     @classmethod
     def from_annotation(
         cls, 
@@ -18,13 +18,14 @@ class TupleType(CallSiteReturnType):
         enclosing_type: Optional[CallSiteReturnType]=None
     ) -> Optional['TupleType']:
         if (
-            not isinstance(annotation, ast.Subscript) or 
-            not isinstance(annotation.value, ast.Name) or 
-            annotation.value.id not in ['Tuple', 'tuple']
+            type(annotation) is not ast.Subscript or 
+            type(annotation.value) is not ast.Name or 
+            annotation.value.id not in ('Tuple', 'tuple')
         ):
             return None
         
-        logger.debug(f"TupleType.from_annotation: {ast.dump(annotation)}...")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("TupleType.from_annotation: %s...", ast.dump(annotation))
         tuple_type = TupleType(call_site, enclosing_type=enclosing_type)
         item_types = []
         for elt in annotation.slice.elts:
@@ -34,39 +35,22 @@ class TupleType(CallSiteReturnType):
             else:
                 raise RuntimeError(f"Failed to parse item type for {ast.dump(elt)}")
         
-        tuple_type._item_types = item_types
-        logger.debug(f"TupleType.from_annotation: {ast.dump(annotation)}")
+        tuple_type._item_types = tuple(item_types)
+        tuple_type._children = tuple_type._item_types
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("TupleType.from_annotation: %s", ast.dump(annotation))
         return tuple_type
 
     def __init__(self, call_site, enclosing_type: Optional[CallSiteReturnType]=None, item_types: Optional[List[CallSiteReturnType]]=None):
         CallSiteReturnType.__init__(self, call_site, enclosing_type)
-        self._item_types = item_types or []
+        self._item_types = tuple(item_types or ())
+        self._children = self._item_types
 
     def runtime_type(self) -> Type:
         item_types = [item_type.runtime_type() for item_type in self._item_types]
         return Tuple[*item_types]
 
-    def get_referenced_custom_classes(self, visited: Optional[Set[CallSiteReturnType]]=None) -> List[Type]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return []
-        visited.add(self)
-        result = []
-        for item_type in self._item_types:
-            result.extend(item_type.get_referenced_custom_classes(visited))
-        return result
-
-    def get_dependent_modules(self, visited: Optional[Set[CallSiteReturnType]]=None) -> Dict[str, Union[ModuleType, Cell]]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return {}
-        visited.add(self)
-        dependent_modules = {}
-        for item_type in self._item_types:
-            dependent_modules.update(item_type.get_dependent_modules(visited))
-        return dependent_modules
-
     def __str__(self):
-        return f"Tuple[{', '.join([str(item_type) for item_type in self._item_types])}]"
\ No newline at end of file
+        if self._str is None:
+            self._str = f"Tuple[{', '.join([str(item_type) for item_type in self._item_types])}]"
+        return self._str
\ No newline at end of file
@@ -1,15 +1,15 @@
 import ast
-from typing import Optional, List, Union, Set, Type, Dict
-from types import ModuleType
+from typing import Optional, List, Union, Type
 
 from npllm.core.call_site_return_type import CallSiteReturnType
-from npllm.core.notebook import Cell
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 class UnionType(CallSiteReturnType):
+    __slots__ = ('_types',)
+
     @classmethod
     def from_annotation(
         cls, 
@@ -17,68 +17,54 @@ class UnionType(CallSiteReturnType):
         call_site, 
         enclosing_type: Optional[CallSiteReturnType]=None
     ) -> Optional['UnionType']:
-        if isinstance(annotation, ast.BinOp) and isinstance(annotation.op, ast.BitOr):
-            logger.debug(f"UnionType.from_annotation: {ast.dump(annotation)}...")
+        if type(annotation) is ast.BinOp and type(annotation.op) is ast.BitOr:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("UnionType.from_annotation: %s...", ast.dump(annotation))
             left_type = CallSiteReturnType.from_annotation(annotation.left, call_site, enclosing_type)
             right_type = CallSiteReturnType.from_annotation(annotation.right, call_site, enclosing_type)
             if left_type and right_type:
-                logger.debug(f"UnionType.from_annotation: {ast.dump(annotation)}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("UnionType.from_annotation: %s", ast.dump(annotation))
                 return UnionType(call_site, types=[left_type, right_type], enclosing_type=enclosing_type)
             else:
                 raise RuntimeError(f"Failed to parse union type for {ast.dump(annotation)}")
-        elif isinstance(annotation, ast.Subscript) and isinstance(annotation.value, ast.Name) and annotation.value.id in ['Union', 'union']:
-            logger.debug(f"UnionType.from_annotation: {ast.dump(annotation)}...")
+        elif type(annotation) is ast.Subscript and type(annotation.value) is ast.Name and annotation.value.id in ('Union', 'union'):
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("UnionType.from_annotation: %s...", ast.dump(annotation))
             union_type = UnionType(call_site, enclosing_type=enclosing_type)
-            if not hasattr(annotation.slice, 'elts'):
-                type = CallSiteReturnType.from_annotation(annotation.slice, call_site, union_type)
-                if type:
-                    union_type._types = [type]
-                    logger.debug(f"UnionType.from_annotation: {ast.dump(annotation)}")
+            if type(annotation.slice) is not ast.Tuple:
+                member_type = CallSiteReturnType.from_annotation(annotation.slice, call_site, union_type)
+                if member_type:
+                    union_type._types = union_type._children = (member_type,)
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("UnionType.from_annotation: %s", ast.dump(annotation))
                     return union_type
                 raise RuntimeError(f"Failed to parse union type for {ast.dump(annotation)}")
             else:
                 types = []
                 for elt in annotation.slice.elts:
-                    type = CallSiteReturnType.from_annotation(elt, call_site, union_type)
-                    if type:
-                        types.append(type)
+                    member_type = CallSiteReturnType.from_annotation(elt, call_site, union_type)
+                    if member_type:
+                        types.append(member_type)
                     else:
                         raise RuntimeError(f"Failed to parse union type for {ast.dump(annotation)}")
-                union_type._types = types
-                logger.debug(f"UnionType.from_annotation: {ast.dump(annotation)}")
+                union_type._types = union_type._children = tuple(types)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("UnionType.from_annotation: %s", ast.dump(annotation))
                 return union_type
         else:
             return None
     
     def __init__(self, call_site, types: Optional[List[CallSiteReturnType]]=None, enclosing_type: Optional[CallSiteReturnType]=None):
         CallSiteReturnType.__init__(self, call_site, enclosing_type)
-        self._types = types
+        self._types = tuple(types) if types else None
+        self._children = self._types or ()
 
     def runtime_type(self) -> Type:
         types = [type.runtime_type() for type in self._types]
         return Union[*types]
 
-    def get_referenced_custom_classes(self, visited: Optional[Set[CallSiteReturnType]]=None) -> List[Type]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return []
-        visited.add(self)
-        result = []
-        for type in self._types:
-            result.extend(type.get_referenced_custom_classes(visited))
-        return result
-
-    def get_dependent_modules(self, visited: Optional[Set[CallSiteReturnType]]=None) -> Dict[str, Union[ModuleType, Cell]]:
-        if visited is None:
-            visited = set()
-        if self in visited:
-            return {}
-        visited.add(self)
-        dependent_modules = {}
-        for type in self._types:
-            dependent_modules.update(type.get_dependent_modules(visited))
-        return dependent_modules
-
     def __str__(self):
-        return f"Union[{', '.join([str(type) for type in self._types])}]"
\ No newline at end of file
+        if self._str is None:
+            self._str = f"Union[{', '.join([str(type) for type in self._types])}]"
+        return self._str
\ No newline at end of file
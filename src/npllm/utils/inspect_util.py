@@ -1,10 +1,19 @@
 import inspect
+import os
 import sys
-from types import FrameType, MethodType, ModuleType
-from typing import Optional, Type
+from types import CodeType, FrameType, MethodType, ModuleType
+from typing import Any, Optional, Tuple, Type, Union, Callable, Hashable
+from weakref import WeakKeyDictionary
+
+# class or function -> (version of its source, memoized value), redefined notebook classes and functions are dropped
+_sources: 'WeakKeyDictionary[Union[Type, Callable], Tuple[Hashable, str]]' = WeakKeyDictionary()
+_first_line_numbers: 'WeakKeyDictionary[Union[Type, Callable], Tuple[Hashable, int]]' = WeakKeyDictionary()
 
 def is_module_frame(frame: FrameType) -> bool:
-    return frame.f_code.co_name == "<module>"
+    return is_module_code(frame.f_code)
+
+def is_module_code(code: CodeType) -> bool:
+    return code.co_name == "<module>"
 
 def get_module_object(frame: FrameType) -> Optional[ModuleType]:
     module_name = frame.f_globals.get('__name__')
@@ -34,4 +43,45 @@ def get_class_from_module(class_name: str, module: ModuleType) -> Optional[Type]
     if obj.__module__ != module.__name__:
         return None
 
-    return obj
\ No newline at end of file
+    return obj
+
+def file_version(path: str) -> Tuple[int, int]:
+    """(mtime, size) of the file, changes whenever the file is rewritten"""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _source_version(obj: Union[Type, Callable]) -> Hashable:
+    # autoreload patches classes and functions in place when their file changes, so the object alone
+    # does not identify its source, the file version and the code object of a function do
+    try:
+        version = file_version(inspect.getsourcefile(obj) or inspect.getfile(obj))
+    except (OSError, TypeError):
+        version = None
+    return (version, getattr(obj, '__code__', None))
+
+def get_source(obj: Union[ModuleType, Type, Callable]) -> str:
+    """inspect.getsource, memoized for classes and functions until their file changes"""
+    if isinstance(obj, ModuleType):
+        # a module keeps its identity across importlib.reload, so always go through linecache
+        return inspect.getsource(obj)
+    if isinstance(obj, MethodType):
+        obj = obj.__func__
+    return _memoized(_sources, obj, inspect.getsource)
+
+def get_first_line_number(obj: Union[ModuleType, Type, Callable]) -> int:
+    """The line number where the source of the object starts, memoized like get_source"""
+    if isinstance(obj, MethodType):
+        obj = obj.__func__
+    if isinstance(obj, ModuleType):
+        return inspect.getsourcelines(obj)[1]
+    return _memoized(_first_line_numbers, obj, lambda obj: inspect.getsourcelines(obj)[1])
+
+def _memoized(cache: WeakKeyDictionary, obj: Union[Type, Callable], compute: Callable[[Any], Any]) -> Any:
+    source_version = _source_version(obj)
+    cached = cache.get(obj)
+    if cached is not None and cached[0] == source_version:
+        return cached[1]
+
+    value = compute(obj)
+    cache[obj] = (source_version, value)
+    return value
@@ -1,7 +1,14 @@
-from typing import List, Optional
+import ast
+from collections import deque
+from functools import lru_cache
+from typing import List, Optional, Dict
+from weakref import WeakKeyDictionary
 
 import npllm.utils.file_util as file_util
 
+_line_indexes: 'WeakKeyDictionary[ast.AST, Dict[int, List[ast.AST]]]' = WeakKeyDictionary()
+_annotated_declaration_indexes: 'WeakKeyDictionary[ast.AST, Dict[str, ast.AnnAssign]]' = WeakKeyDictionary()
+
 def remove_indentation(source_code: str) -> Optional[str]:
     """Remove common leading indentation from all lines in the source code"""
     if not source_code:
@@ -18,4 +25,71 @@ def remove_indentation(source_code: str) -> Optional[str]:
     return "\n".join(trimmed_lines)
 
 def add_line_number(source_code_lines: List[str]) -> str:
-    return file_util.add_line_number(source_code_lines)
\ No newline at end of file
+    return file_util.add_line_number(source_code_lines)
+
+def add_line_number_to_blocks(blocks: List[List[str]]) -> str:
+    """Add line numbers to the blocks of source code lines separated by an empty line, without joining the blocks first"""
+    line_count = sum(len(block) for block in blocks) + len(blocks) - 1
+    if line_count <= 0:
+        return ""
+
+    def lines():
+        for i, block in enumerate(blocks):
+            if i > 0:
+                yield ""
+            yield from block
+
+    width = len(str(line_count))
+    return "\n".join(f"{i + 1:>{width}} | {line}" for i, line in enumerate(lines()))
+
+@lru_cache(maxsize=512)
+def parse_source(source_code: str) -> ast.Module:
+    """Parse the source code, reusing the tree for sources that have been parsed before"""
+    return ast.parse(source_code)
+
+def line_index(tree: ast.AST) -> Dict[int, List[ast.AST]]:
+    """Index the nodes of the tree by line number, in ast.walk order"""
+    index = _line_indexes.get(tree)
+    if index is None:
+        index = {}
+        for node in ast.walk(tree):
+            lineno = getattr(node, 'lineno', None)
+            if lineno is not None:
+                index.setdefault(lineno, []).append(node)
+        _line_indexes[tree] = index
+    return index
+
+def annotated_declaration_index(tree: ast.AST) -> Dict[str, ast.AnnAssign]:
+    """Index the annotated declarations of the tree by target name, `self.x` style for attributes"""
+    index = _annotated_declaration_indexes.get(tree)
+    if index is None:
+        index = {}
+        for node in ast.walk(tree):
+            if type(node) is not ast.AnnAssign:
+                continue
+            target = node.target
+            if type(target) is ast.Name:
+                index.setdefault(target.id, node)
+            elif type(target) is ast.Attribute and type(target.value) is ast.Name:
+                index.setdefault(f"{target.value.id}.{target.attr}", node)
+        _annotated_declaration_indexes[tree] = index
+    return index
+
+def find_class_def(tree: ast.AST, class_name: str) -> Optional[ast.ClassDef]:
+    """Find the class definition in the tree, in ast.walk order but only descending into statements"""
+    # class sources and most modules define the class at the top level, which is found without queueing any nested block
+    for node in getattr(tree, 'body', ()):
+        if type(node) is ast.ClassDef and node.name == class_name:
+            return node
+
+    queue = deque([tree])
+    while queue:
+        node = queue.popleft()
+        if type(node) is ast.ClassDef and node.name == class_name:
+            return node
+        # classes can only be defined in statement blocks, expressions never need to be visited
+        for field in ('body', 'handlers', 'orelse', 'finalbody', 'cases'):
+            children = getattr(node, field, None)
+            if isinstance(children, list):
+                queue.extend(children)
+    return None
\ No newline at end of file